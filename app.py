@@ -11,7 +11,7 @@ from langchain_core.runnables import ConfigurableFieldSpec,RunnableLambda
 from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_openai import ChatOpenAI
 from langchain.agents import AgentExecutor, create_tool_calling_agent
-from utils import RAGManager
+from utils import RAGManager, DEFAULT_NAMESPACE
 from utils import setup_tools
 from dotenv import load_dotenv
 
@@ -108,6 +108,9 @@ For each request:
 3. Use the tool to get the information needed
 4. Present the information in a clear, educational way
 
+For spending breakdowns, monthly trends, top merchants or portfolio holdings, prefer the spending_by_category,
+spending_by_month, top_merchants, rolling_monthly_spending and portfolio_summary tools over writing SQL.
+
 When users ask for financial advice, investment recommendations, or best practices, use the retrieve_financial_knowledge tool to get relevant information from our knowledge base.
 
 Always be helpful, clear, and educational in your responses. Explain financial concepts simply.
@@ -158,23 +161,73 @@ def show_admin_interface(rag_manager):
     
     st.info("As an admin, you can upload financial knowledge that will be used to power the chatbot's responses.")
     
-    st.subheader("Upload Knowledge File")
-    uploaded_file = st.file_uploader("Choose a text file", type=["txt"], key="file_uploader")
+    namespaces = rag_manager.list_namespaces()
+    if DEFAULT_NAMESPACE not in namespaces:
+        namespaces.insert(0, DEFAULT_NAMESPACE)
     
-    if uploaded_file:
-
-        with NamedTemporaryFile(delete=False, suffix=".txt") as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            temp_path = tmp_file.name
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_namespace = st.selectbox("Namespace:", options=namespaces + ["New namespace..."], key="namespace_select")
+        if selected_namespace == "New namespace...":
+            namespace = st.text_input("New namespace name:", key="new_namespace", placeholder="retirement-planning").strip()
+        else:
+            namespace = selected_namespace
+    with col2:
+        topic = st.text_input("Topic:", key="topic_input", placeholder="general").strip() or None
+    
+    if not namespace:
+        st.warning("Enter a namespace name to continue.")
+        return
+    
+    upload_tab, text_tab, reset_tab = st.tabs(["Upload File", "Add Text", "Reset"])
+    
+    with upload_tab:
+        st.subheader("Upload Knowledge File")
+        uploaded_file = st.file_uploader("Choose a text file", type=["txt"], key="file_uploader")
         
+        if uploaded_file:
 
-        if st.button("Process File"):
-            with st.spinner("Processing file..."):
-                result = rag_manager.add_document_from_file(temp_path)
-                st.success(result)
+            with NamedTemporaryFile(delete=False, suffix=".txt") as tmp_file:
+                tmp_file.write(uploaded_file.getvalue())
+                temp_path = tmp_file.name
             
 
-            os.unlink(temp_path)
+            if st.button("Process File"):
+                with st.spinner("Processing file..."):
+                    result = rag_manager.add_document_from_file(
+                        temp_path, namespace=namespace, topic=topic, source=uploaded_file.name
+                    )
+                    st.success(result)
+                
+
+                os.unlink(temp_path)
+    
+    with text_tab:
+        st.subheader("Add Knowledge Directly")
+        knowledge_text = st.text_area("Financial knowledge:", key="knowledge_text", height=200)
+        source = st.text_input("Source:", key="knowledge_source", placeholder="user_input").strip() or "user_input"
+        
+        if st.button("Add Text", disabled=not knowledge_text.strip()):
+            with st.spinner("Adding text..."):
+                result = rag_manager.add_text(knowledge_text, metadata={"source": source}, namespace=namespace, topic=topic)
+                st.success(result)
+    
+    with reset_tab:
+        st.subheader("Reset Namespace")
+        try:
+            st.caption(f"'{namespace}' currently holds {rag_manager.count_chunks(namespace)} chunks. Other namespaces are not affected.")
+        except ValueError as e:
+            st.error(str(e))
+            return
+        confirm = st.checkbox(f"I understand this deletes every chunk in '{namespace}'", key="confirm_reset")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Reset", disabled=not confirm):
+                st.success(rag_manager.reset_namespace(namespace))
+        with col2:
+            if st.button("Reset and Add Default Knowledge", disabled=not confirm):
+                st.success(rag_manager.rebuild_namespace(namespace))
     
 
 def show_user_interface(agent_executor_with_history):
@@ -270,7 +323,12 @@ def submit_email(email):
 def main():
     rag_manager = RAGManager("fintech_app/data/chroma_db")
     
-    tools = setup_tools(rag_manager, llm=llm, user_email=st.session_state.user_email)
+    tools = setup_tools(
+        rag_manager,
+        llm=llm,
+        user_email=st.session_state.user_email,
+        conversation_id=st.session_state.current_conversation_id
+    )
     agent_executor_with_history = setup_agent(tools)
     
     with st.sidebar:
@@ -0,0 +1,84 @@
+"""Measure knowledge base retrieval latency as the corpus grows.
+
+Compares a similarity search over the whole corpus in one collection with a
+search scoped to a single namespace and with a metadata-filtered search.
+Uses deterministic fake embeddings, so no API key is needed and the numbers
+reflect Chroma's search cost rather than embedding latency.
+
+Run with `python benchmark_rag.py`.
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+from utils.rag import RAGManager
+
+TOPICS = ["budgeting", "investing", "retirement", "taxes", "credit"]
+
+
+def build_corpus(rag_manager, size, namespaces, batch_size=1000):
+    """Add `size` chunks to a single shared namespace and the same chunks split across per-domain namespaces."""
+    for offset in range(0, size, batch_size):
+        texts, metadatas = [], []
+        for i in range(offset, min(offset + batch_size, size)):
+            namespace = f"domain-{i % namespaces}"
+            topic = TOPICS[(i // namespaces) % len(TOPICS)]
+            texts.append(f"Financial note {i} about {topic} in {namespace}.")
+            metadatas.append({"source": "benchmark", "topic": topic, "namespace": namespace})
+
+        rag_manager.get_vector_store("all-docs").add_texts(texts, metadatas=metadatas)
+        for n in range(namespaces):
+            namespace = f"domain-{n}"
+            indices = [j for j, metadata in enumerate(metadatas) if metadata["namespace"] == namespace]
+            rag_manager.get_vector_store(namespace).add_texts(
+                [texts[j] for j in indices], metadatas=[metadatas[j] for j in indices]
+            )
+
+
+def time_queries(retriever, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        retriever.invoke(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--namespaces", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    queries = [f"How should I think about {TOPICS[i % len(TOPICS)]}?" for i in range(args.queries)]
+
+    print(f"{'chunks':>8} {'full corpus ms':>15} {'namespace ms':>13} {'ns + topic ms':>14} {'reset ms':>9}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as persist_directory:
+            rag_manager = RAGManager(
+                f"{persist_directory}/chroma_db",
+                embeddings=DeterministicFakeEmbedding(size=1536),
+                llm=FakeListChatModel(responses=[""])
+            )
+            build_corpus(rag_manager, size, args.namespaces)
+
+            full = time_queries(rag_manager.get_retriever("all-docs"), queries)
+            namespaced = time_queries(rag_manager.get_retriever("domain-0"), queries)
+            filtered = time_queries(
+                rag_manager.get_retriever("domain-0", metadata_filter={"topic": "investing"}), queries
+            )
+
+            start = time.perf_counter()
+            rag_manager.reset_namespace("domain-0")
+            reset = (time.perf_counter() - start) * 1000
+
+            print(f"{size:>8} {full:>15.2f} {namespaced:>13.2f} {filtered:>14.2f} {reset:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
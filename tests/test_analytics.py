@@ -0,0 +1,127 @@
+import sqlite3
+from unittest import mock
+
+import pytest
+
+from utils import analytics
+from utils.analytics import SnapshotCache, UserSnapshot
+
+USER = "siva@gmail.com"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "finance_data.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, email_id TEXT, date TEXT, amount REAL, category TEXT, description TEXT)""")
+    conn.execute("""CREATE TABLE portfolio (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, email_id TEXT, symbol TEXT, shares REAL, purchase_price REAL, purchase_date TEXT)""")
+    conn.executemany(
+        "INSERT INTO transactions (email_id, date, amount, category, description) VALUES (?, ?, ?, ?, ?)",
+        [
+            (USER, "2025-01-05", 2000.0, "Income", "Salary"),
+            (USER, "2025-01-10", -100.0, "Food", "Grocery shopping"),
+            (USER, "2025-01-20", -50.0, "Food", "Restaurant"),
+            (USER, "2025-03-02", -300.0, "Housing", "Rent"),
+            (USER, "2025-03-15", -40.0, "Food", "Grocery shopping"),
+            (USER, "2025-03-20", -10.0, None, None),
+            (USER, None, -999.0, "Food", "Undated"),
+            (USER, "01/05/2025", -999.0, "Food", "Malformed date"),
+            ("rishik@gmail.com", "2025-01-01", -5000.0, "Food", "Other user"),
+        ]
+    )
+    conn.executemany(
+        "INSERT INTO portfolio (email_id, symbol, shares, purchase_price, purchase_date) VALUES (?, ?, ?, ?, ?)",
+        [
+            (USER, "AAPL", 2.0, 150.0, "2024-06-01"),
+            (USER, "AAPL", 1.0, 200.0, "2024-07-01"),
+            (USER, "MSFT", 1.0, 400.0, "07/01/2024"),
+            (USER, None, 5.0, 10.0, "2024-08-01"),
+        ]
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def snapshot(db_path):
+    return UserSnapshot.load(USER, db_path)
+
+
+def test_load_skips_undated_and_malformed_rows_and_fills_nulls(snapshot):
+    assert len(snapshot.amounts) == 6
+    assert "Uncategorized" in snapshot.categories
+    assert list(snapshot.symbols) == ["AAPL", "AAPL", "MSFT"]
+    assert snapshot.nbytes > 0
+
+
+def test_totals_by_category(snapshot):
+    assert analytics.totals_by_category(snapshot) == [
+        ("Housing", -300.0),
+        ("Food", -190.0),
+        ("Uncategorized", -10.0),
+        ("Income", 2000.0),
+    ]
+
+
+def test_totals_by_month(snapshot):
+    assert analytics.totals_by_month(snapshot) == [
+        ("2025-01", 2000.0, -150.0, 1850.0),
+        ("2025-03", 0.0, -350.0, -350.0),
+    ]
+
+
+def test_top_merchants(snapshot):
+    assert analytics.top_merchants(snapshot, 2) == [("Rent", -300.0), ("Grocery shopping", -140.0)]
+
+
+def test_rolling_monthly_spending_counts_empty_months_as_zero(snapshot):
+    assert analytics.rolling_monthly_spending(snapshot, 2) == [
+        ("2025-01", -150.0, -150.0),
+        ("2025-02", 0.0, -75.0),
+        ("2025-03", -350.0, -175.0),
+    ]
+
+
+def test_portfolio_summary(snapshot):
+    assert analytics.portfolio_summary(snapshot) == [("AAPL", 3.0, 500.0), ("MSFT", 1.0, 400.0)]
+
+
+def test_empty_snapshot(db_path):
+    snapshot = UserSnapshot.load("nobody@example.com", db_path)
+    assert analytics.format_totals_by_category(snapshot) == "No transactions found."
+    assert analytics.format_rolling_monthly_spending(snapshot) == "No transactions found."
+    assert analytics.format_portfolio_summary(snapshot) == "No portfolio holdings found."
+
+
+def test_cache_reuses_snapshot_until_invalidated(db_path):
+    cache = SnapshotCache(db_path)
+    first = cache.get(USER)
+    assert cache.get(USER) is first
+
+    cache.invalidate(USER)
+    assert cache.get(USER) is not first
+
+
+def test_cache_evicts_least_recently_used(db_path):
+    size = UserSnapshot.load(USER, db_path).nbytes
+    cache = SnapshotCache(db_path, max_bytes=size + 1)
+    first = cache.get(USER)
+    cache.get("rishik@gmail.com")
+    assert cache.get(USER) is not first
+
+
+def test_cache_drops_snapshot_loaded_during_invalidation(db_path):
+    cache = SnapshotCache(db_path)
+    load = UserSnapshot.load
+
+    def load_then_invalidate(email_id, path):
+        snapshot = load(email_id, path)
+        cache.invalidate()
+        return snapshot
+
+    with mock.patch.object(UserSnapshot, "load", side_effect=load_then_invalidate):
+        stale = cache.get(USER)
+    assert cache.get(USER) is not stale
@@ -0,0 +1,238 @@
+from unittest import mock
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from utils import rag
+from utils.rag import DEFAULT_NAMESPACE, RAGManager, RetrievalCache, _is_standalone_question
+
+
+@pytest.fixture
+def rag_manager(tmp_path):
+    return RAGManager(
+        str(tmp_path / "chroma_db"),
+        embeddings=DeterministicFakeEmbedding(size=32),
+        llm=FakeListChatModel(responses=["answer"])
+    )
+
+
+@pytest.fixture(autouse=True)
+def session_histories():
+    rag._session_histories.clear()
+    yield rag._session_histories
+    rag._session_histories.clear()
+
+
+def contents(documents):
+    return sorted(document.page_content for document in documents)
+
+
+def test_chunks_carry_namespace_topic_and_source(rag_manager):
+    rag_manager.add_text("Roth IRA basics", namespace="retirement", topic="ira")
+
+    [document] = rag_manager.retrieve("ira", namespace="retirement")
+    assert document.metadata == {"source": "user_input", "topic": "ira", "namespace": "retirement"}
+
+
+def test_add_document_from_file(rag_manager, tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("Municipal bonds are often tax exempt.")
+
+    result = rag_manager.add_document_from_file(str(path), namespace="taxes", source="notes.txt")
+
+    assert result == "Successfully added 1 chunks from notes.txt to 'taxes'"
+    assert rag_manager.retrieve("bonds", namespace="taxes")[0].metadata["source"] == "notes.txt"
+
+
+def test_retrieve_searches_one_or_all_namespaces(rag_manager):
+    rag_manager.add_text("Roth IRA basics", namespace="retirement")
+    rag_manager.add_text("Budget with the 50/30/20 rule", namespace="budgeting")
+
+    assert contents(rag_manager.retrieve("rule", namespace="budgeting")) == ["Budget with the 50/30/20 rule"]
+    assert contents(rag_manager.retrieve("rule")) == ["Budget with the 50/30/20 rule", "Roth IRA basics"]
+
+
+def test_retrieve_applies_metadata_filter(rag_manager):
+    rag_manager.add_text("Roth IRA basics", namespace="retirement", topic="ira")
+    rag_manager.add_text("401(k) matching", namespace="retirement", topic="401k")
+
+    assert contents(rag_manager.retrieve("plans", metadata_filter={"topic": "401k"})) == ["401(k) matching"]
+
+
+def test_retrieve_embeds_query_once_across_namespaces(rag_manager):
+    for namespace in ["retirement", "budgeting", "taxes", "investing"]:
+        rag_manager.add_text(f"Notes on {namespace}", namespace=namespace)
+
+    embed_query = DeterministicFakeEmbedding.embed_query
+
+    with mock.patch.object(DeterministicFakeEmbedding, "embed_query", autospec=True, side_effect=embed_query) as embed_query:
+        assert len(rag_manager.retrieve("notes")) == 4
+        assert embed_query.call_count == 1
+
+        rag_manager.retrieve("notes")
+        assert embed_query.call_count == 1
+
+
+def test_read_paths_do_not_create_namespaces(rag_manager):
+    with pytest.raises(ValueError, match="Unknown namespace 'investing'. Available namespaces: langchain"):
+        rag_manager.retrieve("stocks", namespace="investing")
+    with pytest.raises(ValueError, match="Unknown namespace"):
+        rag_manager.get_retriever("investing")
+    assert rag_manager.count_chunks("investing") == 0
+    assert rag_manager.reset_namespace("investing") == "Reset namespace 'investing'"
+
+    assert rag_manager.list_namespaces() == [DEFAULT_NAMESPACE]
+
+
+def test_reset_only_clears_one_namespace(rag_manager):
+    rag_manager.add_text("Roth IRA basics", namespace="retirement")
+    rag_manager.add_default_knowledge()
+
+    assert rag_manager.reset_namespace("retirement") == "Reset namespace 'retirement'"
+    assert rag_manager.count_chunks("retirement") == 0
+    assert rag_manager.count_chunks(DEFAULT_NAMESPACE) == 10
+
+
+def test_rebuild_restores_default_knowledge(rag_manager):
+    rag_manager.add_text("Stale note")
+
+    rag_manager.rebuild_namespace()
+
+    assert rag_manager.count_chunks() == 10
+    assert "Stale note" not in contents(rag_manager.retrieve("note", k=20))
+
+
+def test_invalid_namespace_is_reported(rag_manager):
+    assert rag_manager.add_text("text", namespace="x").startswith("Error adding text: Invalid namespace 'x'")
+    with pytest.raises(ValueError):
+        rag_manager.get_vector_store("bad name!")
+
+
+@pytest.mark.parametrize("question", [
+    "What is diversification?",
+    "How do index funds work?",
+    "Should I pay off high-interest debt before investing?",
+    "What are the risks of investing in crypto?",
+    "What's the difference between a Roth IRA and a 401(k)?",
+    "Is a Roth IRA better than a 401(k)?",
+])
+def test_standalone_questions(question):
+    assert _is_standalone_question(question)
+
+
+@pytest.mark.parametrize("question", [
+    "Why?",
+    "Diversification?",
+    "What about them?",
+    "And bonds?",
+    "Tell me more",
+    "Is it a good idea for me?",
+    "What's the difference?",
+    "Which is better?",
+    "What are the risks?",
+    "Are the fees lower?",
+    "Which should I choose?",
+])
+def test_follow_up_questions(question):
+    assert not _is_standalone_question(question)
+
+
+def test_retrieval_cache_hit_and_bump():
+    cache = RetrievalCache()
+    cache.put("store", 0, "query", [("id-1", 0.5)])
+
+    assert cache.get("store", 0, "query") == [("id-1", 0.5)]
+    cache.bump("store")
+    assert cache.revision("store") == 1
+    assert cache.get("store", 0, "query") is None
+
+
+def test_retrieval_cache_ignores_results_from_before_a_bump():
+    cache = RetrievalCache()
+    revision = cache.revision("store")
+    cache.bump("store")
+
+    cache.put("store", revision, "query", [("id-1", 0.5)])
+
+    assert cache.get("store", revision, "query") is None
+    assert cache.get("store", cache.revision("store"), "query") is None
+
+
+def test_retrieval_cache_evicts_least_recently_used():
+    cache = RetrievalCache(max_entries=2)
+    cache.put("store", 0, "a", [])
+    cache.put("store", 0, "b", [])
+    cache.get("store", 0, "a")
+    cache.put("store", 0, "c", [])
+
+    assert cache.get("store", 0, "b") is None
+    assert cache.get("store", 0, "a") == []
+
+
+def test_retrieve_reuses_results_until_ingestion(rag_manager):
+    rag_manager.add_text("Roth IRA basics", namespace="retirement")
+    vector_store = rag_manager.get_vector_store("retirement")
+
+    search_by_vector = vector_store.similarity_search_by_vector_with_relevance_scores
+
+    with mock.patch.object(vector_store, "similarity_search_by_vector_with_relevance_scores", wraps=search_by_vector) as search:
+        first = rag_manager.retrieve("What is a Roth IRA?", namespace="retirement")
+        again = rag_manager.retrieve("what is a  roth IRA?", namespace="retirement")
+        assert search.call_count == 1
+        assert [document.id for document in again] == [document.id for document in first]
+
+        rag_manager.add_text("Backdoor Roth conversions", namespace="retirement")
+        assert len(rag_manager.retrieve("What is a Roth IRA?", namespace="retirement")) == 2
+        assert search.call_count == 2
+
+
+def test_retrieve_accepts_operator_filters(rag_manager):
+    rag_manager.add_text("Roth IRA basics", topic="ira")
+    rag_manager.add_text("401(k) matching", topic="401k")
+    rag_manager.add_text("Budget with the 50/30/20 rule", topic="budgeting")
+
+    metadata_filter = {"topic": {"$in": ["ira", "401k"]}}
+    assert contents(rag_manager.retrieve("plans", metadata_filter=metadata_filter)) == ["401(k) matching", "Roth IRA basics"]
+    assert contents(rag_manager.retrieve("plans", metadata_filter=metadata_filter)) == ["401(k) matching", "Roth IRA basics"]
+
+
+def test_rag_chain_skips_rephrase_for_standalone_questions(rag_manager):
+    rag_manager.add_default_knowledge()
+    rag_manager.llm = FakeListChatModel(responses=["first", "second", "third"])
+    chain = rag_manager.create_rag_chain()
+    history = [HumanMessage("How do index funds work?"), AIMessage("They track an index.")]
+
+    chain.invoke({"input": "What is diversification?", "chat_history": history})
+    assert rag_manager.llm.i == 1
+
+    rag_manager.llm.i = 0
+    chain.invoke({"input": "Are they cheap?", "chat_history": history})
+    assert rag_manager.llm.i == 2
+
+
+def test_conversational_chain_keeps_history_between_calls(rag_manager):
+    rag_manager.add_default_knowledge()
+    config = {"configurable": {"session_id": "siva@gmail.com:conversation"}}
+
+    rag_manager.get_conversational_rag_chain().invoke({"input": "How do index funds work?"}, config=config)
+    with mock.patch("utils.rag._is_standalone_question", return_value=False) as is_standalone:
+        rag_manager.get_conversational_rag_chain().invoke({"input": "Are they cheap?"}, config=config)
+    is_standalone.assert_called_once()
+
+
+def test_session_histories_are_bounded(session_histories, monkeypatch):
+    monkeypatch.setattr(rag, "MAX_SESSIONS", 2)
+    monkeypatch.setattr(rag, "MAX_HISTORY_MESSAGES", 4)
+
+    history = rag._get_session_history("a")
+    for i in range(3):
+        history.add_messages([HumanMessage(f"question {i}"), AIMessage(f"answer {i}")])
+    rag._get_session_history("b")
+    assert [message.content for message in rag._get_session_history("a").messages] == [
+        "question 1", "answer 1", "question 2", "answer 2"
+    ]
+
+    rag._get_session_history("c")
+    assert list(session_histories) == ["a", "c"]
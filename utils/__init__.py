@@ -1,5 +1,5 @@
 #from .database import setup_database
-from .rag import RAGManager
+from .rag import RAGManager, DEFAULT_NAMESPACE
 from .tools import setup_tools
 
-__all__ = ["RAGManager", "setup_tools"]
\ No newline at end of file
+__all__ = ["RAGManager", "DEFAULT_NAMESPACE", "setup_tools"]
\ No newline at end of file
@@ -0,0 +1,249 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+DB_PATH = "fintech_app/data/finance_data.db"
+
+
+class UserSnapshot:
+    """Columnar in-memory copy of one user's transactions and portfolio."""
+
+    def __init__(self, email_id, transactions, portfolio):
+        dates, amounts, categories, descriptions = zip(*transactions) if transactions else ((), (), (), ())
+        self.email_id = email_id
+
+        # Dates are stored as 'YYYY-MM-DD'; keep them as datetime64[D] so the
+        # month bucket is a cheap cast instead of string slicing per query.
+        self.dates = np.array(dates, dtype="datetime64[D]")
+        self.months = self.dates.astype("datetime64[M]")
+        self.amounts = np.array(amounts, dtype=np.float64)
+        self.categories = np.array(categories, dtype=object)
+        self.descriptions = np.array(descriptions, dtype=object)
+
+        symbols, shares, prices, purchase_dates = zip(*portfolio) if portfolio else ((), (), (), ())
+        self.symbols = np.array(symbols, dtype=object)
+        self.shares = np.array(shares, dtype=np.float64)
+        self.purchase_prices = np.array(prices, dtype=np.float64)
+        self.purchase_dates = np.array(purchase_dates, dtype="datetime64[D]")
+
+    @classmethod
+    def load(cls, email_id, db_path=DB_PATH):
+        conn = sqlite3.connect(db_path)
+        try:
+            c = conn.cursor()
+            # Every column is nullable in the schema and rows may be written by
+            # LLM-generated SQL. Rows without a parseable date or a symbol cannot be
+            # bucketed and are skipped; date() normalises the rest to YYYY-MM-DD.
+            c.execute(
+                """SELECT date(date), COALESCE(amount, 0), COALESCE(category, 'Uncategorized'), COALESCE(description, '')
+                FROM transactions WHERE email_id = ? AND date(date) IS NOT NULL ORDER BY date(date)""",
+                (email_id,)
+            )
+            transactions = c.fetchall()
+            c.execute(
+                """SELECT symbol, COALESCE(shares, 0), COALESCE(purchase_price, 0), date(purchase_date)
+                FROM portfolio WHERE email_id = ? AND symbol IS NOT NULL""",
+                (email_id,)
+            )
+            portfolio = c.fetchall()
+        finally:
+            conn.close()
+        return cls(email_id, transactions, portfolio)
+
+    @property
+    def nbytes(self):
+        """Approximate memory footprint, including the Python strings behind object columns."""
+        total = 0
+        for column in (self.dates, self.months, self.amounts, self.shares,
+                       self.purchase_prices, self.purchase_dates):
+            total += column.nbytes
+        for column in (self.categories, self.descriptions, self.symbols):
+            total += column.nbytes + sum(len(value) for value in column)
+        return total
+
+
+class SnapshotCache:
+    """LRU cache of per-user snapshots bounded by total memory."""
+
+    def __init__(self, db_path=DB_PATH, max_bytes=64 * 1024 * 1024):
+        """Initialize the snapshot cache.
+
+        Args:
+            db_path: Path to the SQLite finance database
+            max_bytes: Upper bound on the combined size of all cached snapshots.
+                       Least recently used snapshots are evicted first.
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._snapshots = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        # Bumped by invalidate() so a snapshot loaded before a write is never cached.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, email_id) -> UserSnapshot:
+        """Return the snapshot for a user, loading it from SQLite on first use."""
+        with self._lock:
+            snapshot = self._snapshots.get(email_id)
+            if snapshot is not None:
+                self._snapshots.move_to_end(email_id)
+                return snapshot
+            generation = self._generation
+
+        snapshot = UserSnapshot.load(email_id, self.db_path)
+        size = snapshot.nbytes
+
+        with self._lock:
+            if generation != self._generation:
+                return snapshot
+            self._discard(email_id)
+            # A snapshot larger than the whole budget is still returned, just not kept.
+            if size <= self.max_bytes:
+                self._snapshots[email_id] = snapshot
+                self._sizes[email_id] = size
+                self._total_bytes += size
+                while self._total_bytes > self.max_bytes:
+                    oldest, _ = self._snapshots.popitem(last=False)
+                    self._total_bytes -= self._sizes.pop(oldest)
+        return snapshot
+
+    def invalidate(self, email_id: Optional[str] = None):
+        """Drop the cached snapshot for a user, or every snapshot when no user is given."""
+        with self._lock:
+            self._generation += 1
+            if email_id is None:
+                self._snapshots.clear()
+                self._sizes.clear()
+                self._total_bytes = 0
+            else:
+                self._discard(email_id)
+
+    def _discard(self, email_id):
+        if email_id in self._snapshots:
+            del self._snapshots[email_id]
+            self._total_bytes -= self._sizes.pop(email_id)
+
+
+snapshot_cache = SnapshotCache()
+
+
+def _format_amount(amount):
+    return f"-${-amount:,.2f}" if amount < 0 else f"${amount:,.2f}"
+
+
+def _group_sum(keys, values):
+    """Sum values per distinct key, returning (unique_keys, sums) sorted by key."""
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=values, minlength=len(unique_keys))
+    return unique_keys, sums
+
+
+def totals_by_category(snapshot: UserSnapshot):
+    """Total amount per category, largest spend first."""
+    if snapshot.amounts.size == 0:
+        return []
+    categories, sums = _group_sum(snapshot.categories, snapshot.amounts)
+    order = np.argsort(sums)
+    return [(categories[i], float(sums[i])) for i in order]
+
+
+def totals_by_month(snapshot: UserSnapshot):
+    """Income, spending and net amount per calendar month, oldest first."""
+    if snapshot.amounts.size == 0:
+        return []
+    income = np.where(snapshot.amounts > 0, snapshot.amounts, 0.0)
+    spending = np.where(snapshot.amounts < 0, snapshot.amounts, 0.0)
+    months, income_sums = _group_sum(snapshot.months, income)
+    _, spending_sums = _group_sum(snapshot.months, spending)
+    return [
+        (str(months[i]), float(income_sums[i]), float(spending_sums[i]), float(income_sums[i] + spending_sums[i]))
+        for i in range(len(months))
+    ]
+
+
+def top_merchants(snapshot: UserSnapshot, n=5):
+    """Descriptions with the highest total spend."""
+    expenses = snapshot.amounts < 0
+    if not expenses.any():
+        return []
+    merchants, sums = _group_sum(snapshot.descriptions[expenses], snapshot.amounts[expenses])
+    order = np.argsort(sums)[:n]
+    return [(merchants[i], float(sums[i])) for i in order]
+
+
+def rolling_monthly_spending(snapshot: UserSnapshot, window=3):
+    """Spending per calendar month alongside its trailing average over `window` calendar months.
+
+    Months without any expenses count as zero spending.
+    """
+    if snapshot.amounts.size == 0:
+        return []
+    expenses = snapshot.amounts < 0
+    months = np.arange(snapshot.months.min(), snapshot.months.max() + 1)
+    spending = np.zeros(len(months))
+    np.add.at(spending, (snapshot.months[expenses] - months[0]).astype(np.int64), snapshot.amounts[expenses])
+    cumulative = np.concatenate(([0.0], np.cumsum(spending)))
+    rows = []
+    for i, month in enumerate(months):
+        start = max(0, i + 1 - window)
+        average = (cumulative[i + 1] - cumulative[start]) / (i + 1 - start)
+        rows.append((str(month), float(spending[i]), float(average)))
+    return rows
+
+
+def portfolio_summary(snapshot: UserSnapshot):
+    """Shares held and cost basis per symbol, largest position first."""
+    if snapshot.symbols.size == 0:
+        return []
+    symbols, shares = _group_sum(snapshot.symbols, snapshot.shares)
+    _, cost = _group_sum(snapshot.symbols, snapshot.shares * snapshot.purchase_prices)
+    order = np.argsort(-cost)
+    return [(symbols[i], float(shares[i]), float(cost[i])) for i in order]
+
+
+def format_totals_by_category(snapshot: UserSnapshot):
+    rows = totals_by_category(snapshot)
+    if not rows:
+        return "No transactions found."
+    return "\n".join(f"{category}: {_format_amount(total)}" for category, total in rows)
+
+
+def format_totals_by_month(snapshot: UserSnapshot):
+    rows = totals_by_month(snapshot)
+    if not rows:
+        return "No transactions found."
+    return "\n".join(
+        f"{month}: income {_format_amount(income)}, spending {_format_amount(spending)}, net {_format_amount(net)}"
+        for month, income, spending, net in rows
+    )
+
+
+def format_top_merchants(snapshot: UserSnapshot, n=5):
+    rows = top_merchants(snapshot, n)
+    if not rows:
+        return "No expenses found."
+    return "\n".join(f"{merchant}: {_format_amount(total)}" for merchant, total in rows)
+
+
+def format_rolling_monthly_spending(snapshot: UserSnapshot, window=3):
+    rows = rolling_monthly_spending(snapshot, window)
+    if not rows:
+        return "No transactions found."
+    return "\n".join(
+        f"{month}: spending {_format_amount(spending)}, {window}-month average {_format_amount(average)}"
+        for month, spending, average in rows
+    )
+
+
+def format_portfolio_summary(snapshot: UserSnapshot):
+    rows = portfolio_summary(snapshot)
+    if not rows:
+        return "No portfolio holdings found."
+    return "\n".join(
+        f"{symbol}: {shares:,.2f} shares, cost basis {_format_amount(cost)}"
+        for symbol, shares, cost in rows
+    )
@@ -1,5 +1,11 @@
+import json
 import os
 import pathlib
+import re
+import threading
+from collections import OrderedDict
+
+import chromadb
 from langchain_community.document_loaders import TextLoader, PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
@@ -9,59 +15,339 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.chains.combine_documents.stuff import create_stuff_documents_chain
 from langchain.chains.retrieval import create_retrieval_chain
 from langchain_openai import ChatOpenAI
-from langchain.chains import create_history_aware_retriever
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+from langchain_community.chat_message_histories import ChatMessageHistory
+
+# Chunks added before namespaces existed live in langchain_chroma's default
+# collection, so that collection doubles as the default namespace.
+DEFAULT_NAMESPACE = "langchain"
+
+_NAMESPACE_PATTERN = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9._-]{1,61}[a-zA-Z0-9]$")
+
+# Words that usually point back into the conversation. A question containing
+# none of them is treated as standalone and skips the rephrase LLM call.
+# Comparisons and definite references only count when they are left open
+# ("Which is better?", "What are the risks?"), not when the question names
+# what it is about ("better than a 401(k)", "the risks of crypto").
+_FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|it's|this|that|these|those|they|them|their|he|she|him|her|his|"
+    r"one|ones|above|previous|earlier|former|latter|same|else|again|instead|more|also|too|"
+    r"other|others|either|neither|both)\b"
+    r"|\b(differences?|compare|compared|comparison)\b(?!\s+(between|of|to|with)\b)"
+    r"|\b(better|worse|cheaper|safer|riskier)\b(?!\s+(than|for|in|at)\b)"
+    r"|\bthe\s+(risks?|benefits?|downsides?|advantages?|disadvantages?|pros|cons|fees?|alternatives?)\b"
+    r"(?!\s+(of|for|with|in|to)\b)"
+    r"|^\s*(and|but|or|so|what about|how about|why|what if|which)\b",
+    re.IGNORECASE
+)
+
+
+def _is_standalone_question(question):
+    """Cheap check for questions that can be understood without the chat history."""
+    return len(question.split()) >= 3 and not _FOLLOW_UP_PATTERN.search(question)
+
+
+class RetrievalCache:
+    """LRU cache of standalone query -> retrieved chunk IDs and distances, per namespace.
+
+    Entries are tagged with the knowledge base revision of their namespace.
+    Ingesting into or resetting a namespace bumps its revision, which drops
+    that namespace's entries and makes any in-flight lookup miss.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._revisions = {}
+        self._lock = threading.Lock()
+
+    def revision(self, store_key):
+        with self._lock:
+            return self._revisions.get(store_key, 0)
+
+    def bump(self, store_key):
+        with self._lock:
+            self._revisions[store_key] = self._revisions.get(store_key, 0) + 1
+            for key in [key for key in self._entries if key[0] == store_key]:
+                del self._entries[key]
+
+    def get(self, store_key, revision, query_key):
+        with self._lock:
+            key = (store_key, revision, query_key)
+            ids = self._entries.get(key)
+            if ids is not None:
+                self._entries.move_to_end(key)
+            return ids
+
+    def put(self, store_key, revision, query_key, ids):
+        with self._lock:
+            if self._revisions.get(store_key, 0) != revision:
+                return
+            self._entries[(store_key, revision, query_key)] = ids
+            self._entries.move_to_end((store_key, revision, query_key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Shared across RAGManager instances because the app builds a new manager on every rerun.
+retrieval_cache = RetrievalCache()
+
+# Knowledge base chat histories per session, bounded in both directions: the
+# least recently used sessions are dropped and each keeps only its latest
+# messages, so prompt size and memory stay flat as conversations grow.
+MAX_SESSIONS = 256
+MAX_HISTORY_MESSAGES = 10
+_session_histories = OrderedDict()
+_session_histories_lock = threading.Lock()
+
+
+def _get_session_history(session_id):
+    with _session_histories_lock:
+        history = _session_histories.get(session_id)
+        if history is None:
+            history = _session_histories[session_id] = ChatMessageHistory()
+            while len(_session_histories) > MAX_SESSIONS:
+                _session_histories.popitem(last=False)
+        else:
+            _session_histories.move_to_end(session_id)
+        del history.messages[:-MAX_HISTORY_MESSAGES]
+        return history
+
 
 class RAGManager:
-    def __init__(self, persist_directory="fintech_app/data/chroma_db"):
+    def __init__(self, persist_directory="fintech_app/data/chroma_db", embeddings=None, llm=None):
         """Initialize the RAG manager with a vector store.
         
         Args:
             persist_directory: Directory where Chroma will persist the vector store data.
                               When this is provided, Chroma automatically persists data.
+            embeddings: Embedding model to use. Defaults to OpenAIEmbeddings.
+            llm: Chat model used by the RAG chain. Defaults to gpt-4o-mini.
         """
-        self.embeddings = OpenAIEmbeddings()
+        self.embeddings = embeddings or OpenAIEmbeddings()
 
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.2)
+        self.llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0.2)
 
         os.makedirs(os.path.dirname(persist_directory), exist_ok=True)
 
         self.persist_directory = persist_directory
-        self.vector_store = Chroma(
-            persist_directory=persist_directory,
-            embedding_function=self.embeddings
+        self.client = chromadb.PersistentClient(path=persist_directory)
+        self._vector_stores = {}
+
+        self.vector_store = self.get_vector_store(DEFAULT_NAMESPACE)
+        self.retriever = self.get_retriever()
+
+    def get_vector_store(self, namespace=DEFAULT_NAMESPACE):
+        """Return the vector store backing a namespace, creating its collection on first use.
+
+        Each namespace is a separate Chroma collection, so a search only
+        ever scans the chunks of the knowledge domain it targets. Only write
+        paths should call this; reads go through _existing_vector_store so
+        they never create empty collections as a side effect.
+        """
+        self._validate_namespace(namespace)
+        if namespace not in self._vector_stores:
+            self._vector_stores[namespace] = Chroma(
+                client=self.client,
+                collection_name=namespace,
+                embedding_function=self.embeddings
+            )
+        return self._vector_stores[namespace]
+
+    def _existing_vector_store(self, namespace, namespaces=None):
+        """Return the vector store for a namespace that already exists, without creating it."""
+        self._validate_namespace(namespace)
+        namespaces = self.list_namespaces() if namespaces is None else namespaces
+        if namespace not in namespaces:
+            raise ValueError(f"Unknown namespace '{namespace}'. Available namespaces: {', '.join(namespaces)}")
+        return self.get_vector_store(namespace)
+
+    @staticmethod
+    def _validate_namespace(namespace):
+        if not _NAMESPACE_PATTERN.match(namespace):
+            raise ValueError(
+                f"Invalid namespace '{namespace}'. Use 3-63 letters, digits, '.', '_' or '-', "
+                "starting and ending with a letter or digit."
+            )
+
+    def get_retriever(self, namespace=DEFAULT_NAMESPACE, metadata_filter=None, k=5):
+        """Create a retriever over one namespace.
+
+        Args:
+            namespace: The knowledge domain to search
+            metadata_filter: Optional mapping of metadata fields to required values
+                             (e.g. {"topic": "retirement"}). It narrows which chunks can
+                             be returned; it does not make the search faster.
+            k: Number of chunks to return
+        """
+        search_kwargs = {"k": k}
+        where = self._build_filter(metadata_filter)
+        if where:
+            search_kwargs["filter"] = where
+        return self._existing_vector_store(namespace).as_retriever(search_kwargs=search_kwargs)
+
+    def retrieve(self, query, namespace=None, metadata_filter=None, k=5):
+        """Retrieve chunks for a standalone query, reusing recent results for the same query.
+
+        Searches one namespace, or every namespace when none is given, keeping
+        the `k` closest chunks overall. The query is embedded at most once, and
+        only if some namespace misses the cache. A cache hit fetches the previously
+        retrieved chunks by ID, skipping the query embedding and the vector search.
+
+        Raises:
+            ValueError: If `namespace` does not exist.
+        """
+        available = self.list_namespaces()
+        if namespace:
+            vector_stores = {namespace: self._existing_vector_store(namespace, available)}
+        else:
+            vector_stores = {name: self.get_vector_store(name) for name in available}
+
+        embedding = []
+
+        def query_embedding():
+            if not embedding:
+                embedding.append(self.embeddings.embed_query(query))
+            return embedding[0]
+
+        scored = []
+        for name, vector_store in vector_stores.items():
+            scored.extend(self._retrieve_scored(query, query_embedding, name, vector_store, metadata_filter, k))
+        scored.sort(key=lambda pair: pair[1])
+        return [document for document, _ in scored[:k]]
+
+    def _retrieve_scored(self, query, query_embedding, namespace, vector_store, metadata_filter, k):
+        store_key = (os.path.abspath(self.persist_directory), namespace)
+        query_key = (
+            " ".join(query.lower().split()),
+            json.dumps(self._build_filter(metadata_filter), sort_keys=True),
+            k
+        )
+        revision = retrieval_cache.revision(store_key)
+
+        hits = retrieval_cache.get(store_key, revision, query_key)
+        if hits == []:
+            return []
+        if hits is not None:
+            documents = {
+                document.id: document
+                for document in vector_store.get_by_ids([chunk_id for chunk_id, _ in hits])
+            }
+            if len(documents) == len(hits):
+                return [(documents[chunk_id], distance) for chunk_id, distance in hits]
+
+        results = vector_store.similarity_search_by_vector_with_relevance_scores(
+            query_embedding(), k=k, filter=self._build_filter(metadata_filter)
+        )
+        if all(document.id for document, _ in results):
+            retrieval_cache.put(
+                store_key, revision, query_key, [(document.id, distance) for document, distance in results]
+            )
+        return results
+
+    def _bump_revision(self, namespace):
+        retrieval_cache.bump((os.path.abspath(self.persist_directory), namespace))
+
+    @staticmethod
+    def _build_filter(metadata_filter):
+        if not metadata_filter:
+            return None
+        conditions = [{key: value} for key, value in metadata_filter.items()]
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+
+    @staticmethod
+    def _chunk_metadata(metadata, namespace, topic):
+        metadata = dict(metadata or {})
+        metadata.setdefault("source", "user_input")
+        metadata["topic"] = topic or metadata.get("topic") or "general"
+        metadata["namespace"] = namespace
+        return metadata
+
+    def list_namespaces(self):
+        """List the names of all namespaces that exist in the persisted store."""
+        # chromadb < 0.6 returns Collection objects, newer releases return names.
+        return sorted(
+            collection if isinstance(collection, str) else collection.name
+            for collection in self.client.list_collections()
         )
 
-        self.retriever = self.vector_store.as_retriever(search_kwargs={"k": 5})
+    def count_chunks(self, namespace=DEFAULT_NAMESPACE):
+        """Return the number of chunks stored in a namespace, or 0 if it does not exist yet."""
+        self._validate_namespace(namespace)
+        if namespace not in self.list_namespaces():
+            return 0
+        return self.get_vector_store(namespace)._collection.count()
+
+    def reset_namespace(self, namespace=DEFAULT_NAMESPACE):
+        """Delete every chunk in a namespace, leaving other namespaces untouched.
+
+        The whole collection is dropped rather than deleting chunks one by one.
+        """
+        try:
+            self._validate_namespace(namespace)
+            if namespace in self.list_namespaces():
+                self.client.delete_collection(namespace)
+            self._vector_stores.pop(namespace, None)
+            self._bump_revision(namespace)
+            if namespace == DEFAULT_NAMESPACE:
+                self.vector_store = self.get_vector_store(DEFAULT_NAMESPACE)
+                self.retriever = self.get_retriever()
+
+            return f"Reset namespace '{namespace}'"
+        except Exception as e:
+            return f"Error resetting namespace: {str(e)}"
+
+    def rebuild_namespace(self, namespace=DEFAULT_NAMESPACE):
+        """Reset a namespace and reload it with the default financial knowledge."""
+        result = self.reset_namespace(namespace)
+        if result.startswith("Error"):
+            return result
+        return self.add_default_knowledge(namespace)
         
-    def add_document_from_file(self, file_path):
+    def add_document_from_file(self, file_path, namespace=DEFAULT_NAMESPACE, topic=None, source=None):
+        """Split a PDF or TXT file into chunks and add them to a namespace.
+
+        Args:
+            file_path: Path to the file to load
+            namespace: The knowledge domain the chunks belong to
+            topic: Topic stored on every chunk for metadata-filtered retrieval
+            source: Source name stored on every chunk. Defaults to the loader's file path.
+        """
         try:
             file_extension = pathlib.Path(file_path).suffix.lower()
             
-            documents = loader.load()
             if file_extension == '.pdf':
                 loader = PyPDFLoader(file_path)
             elif file_extension == '.txt':
                 loader = TextLoader(file_path)
             else:
                 return f"Unsupported file type: {file_extension}. Please use PDF or TXT files."
+            documents = loader.load()
             
             text_splitter = RecursiveCharacterTextSplitter(
                     chunk_size=1000,
                     chunk_overlap=100
                 )
             splits = text_splitter.split_documents(documents)
+            for split in splits:
+                if source:
+                    split.metadata["source"] = source
+                split.metadata = self._chunk_metadata(split.metadata, namespace, topic)
             
-            self.vector_store.add_documents(splits)
+            self.get_vector_store(namespace).add_documents(splits)
+            self._bump_revision(namespace)
             
-            return f"Successfully added {len(splits)} chunks from {file_path}"
+            return f"Successfully added {len(splits)} chunks from {source or file_path} to '{namespace}'"
         except Exception as e:
             return f"Error adding document: {str(e)}"        
             
-    def add_text(self, text, metadata=None):
+    def add_text(self, text, metadata=None, namespace=DEFAULT_NAMESPACE, topic=None):
         """Add a text string directly to the vector store."""
         try:
-            if metadata is None:
-                metadata = {"source": "user_input"}
+            metadata = self._chunk_metadata(metadata, namespace, topic)
             
             document = Document(page_content=text, metadata=metadata)
 
@@ -71,15 +357,21 @@ class RAGManager:
             )
             splits = text_splitter.split_documents([document])
 
-            self.vector_store.add_documents(splits)
+            self.get_vector_store(namespace).add_documents(splits)
+            self._bump_revision(namespace)
 
-            return f"Successfully added text ({len(splits)} chunks)"
+            return f"Successfully added text ({len(splits)} chunks) to '{namespace}'"
         
         except Exception as e:
             return f"Error adding text: {str(e)}"
     
-    def create_rag_chain(self):
-        """Create a RAG chain for answering financial questions with conversation history support."""
+    def create_rag_chain(self, namespace=None, metadata_filter=None):
+        """Create a RAG chain for answering financial questions with conversation history support.
+
+        Args:
+            namespace: The knowledge domain to retrieve from. Every namespace is searched when omitted.
+            metadata_filter: Optional metadata constraints applied before the vector search
+        """
         contextualize_q_prompt = """Given above chat history and the below latest user question
             which might reference context in the chat history,
             formulate a standalone question which can be understood
@@ -95,11 +387,18 @@ class RAGManager:
             ("human", contextualize_q_prompt),
         ])
         
-        history_aware_retriever = create_history_aware_retriever(
-            self.llm, 
-            self.retriever, 
-            contextualize_q_prompt_template
-        )
+        contextualize_q_chain = contextualize_q_prompt_template | self.llm | StrOutputParser()
+
+        def standalone_question(inputs):
+            # Only pay for the rephrase call when the question leans on earlier turns.
+            if not inputs.get("chat_history") or _is_standalone_question(inputs["input"]):
+                return inputs["input"]
+            return contextualize_q_chain.invoke(inputs)
+
+        history_aware_retriever = (
+            RunnableLambda(standalone_question)
+            | RunnableLambda(lambda query: self.retrieve(query, namespace, metadata_filter))
+        ).with_config(run_name="chat_retriever_chain")
         
         qa_prompt = ChatPromptTemplate.from_messages([
             ("system", "You are a financial advisor. Answer the question based on the context provided. If you don't know the answer, just say 'I don't know'."),
@@ -114,7 +413,7 @@ class RAGManager:
         
         return rag_chain
     
-    def add_default_knowledge(self):
+    def add_default_knowledge(self, namespace=DEFAULT_NAMESPACE):
         """Add default financial knowledge to the vector store."""
         financial_docs = [
             "When investing, diversification is key to reducing risk. Spread investments across different asset classes.",
@@ -129,34 +428,36 @@ class RAGManager:
             "Consider your risk tolerance and time horizon when choosing investments."
         ]
         
-        documents = [Document(page_content=doc, metadata={"source": "default_knowledge"}) for doc in financial_docs]
-        self.vector_store.add_documents(documents)
+        documents = [
+            Document(
+                page_content=doc,
+                metadata=self._chunk_metadata({"source": "default_knowledge"}, namespace, "fundamentals")
+            )
+            for doc in financial_docs
+        ]
+        self.get_vector_store(namespace).add_documents(documents)
+        self._bump_revision(namespace)
         
-        return "Added default financial knowledge to the vector store."
+        return f"Added default financial knowledge to '{namespace}'."
     
-    def get_conversational_rag_chain(self):
+    def get_conversational_rag_chain(self, namespace=None, metadata_filter=None):
         """
         Creates a conversational RAG chain with automatic message history management.
         
+        Args:
+            namespace: The knowledge domain to retrieve from. Every namespace is searched when omitted.
+            metadata_filter: Optional metadata constraints applied before the vector search
+        
         Returns:
             A runnable chain that can be used with session IDs to maintain conversation history.
         """
-        from langchain_community.chat_message_histories import ChatMessageHistory
-        from langchain_core.chat_history import BaseChatMessageHistory
         from langchain_core.runnables.history import RunnableWithMessageHistory
 
-        store = {}
-
-        def get_session_history(session_id: str) -> BaseChatMessageHistory:
-            if session_id not in store:
-                store[session_id] = ChatMessageHistory()
-            return store[session_id]
-        
-        rag_chain = self.create_rag_chain()
+        rag_chain = self.create_rag_chain(namespace, metadata_filter)
 
         conversational_rag_chain = RunnableWithMessageHistory(
             rag_chain,
-            get_session_history,
+            _get_session_history,
             input_messages_key="input",
             history_messages_key="chat_history",
             output_messages_key="answer",
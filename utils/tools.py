@@ -1,19 +1,26 @@
 import yfinance as yf
-from langchain_core.tools import Tool
+from langchain_core.tools import Tool, StructuredTool
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_experimental.tools import PythonREPLTool
 from .database import get_db_toolkit
 from .rag import RAGManager
+from . import analytics
 from typing import List, cast, Optional
 
-def setup_tools(rag_manager: RAGManager, llm, user_email: Optional[str] = None):
+def setup_tools(rag_manager: RAGManager, llm, user_email: Optional[str] = None, conversation_id: Optional[str] = None):
     """Set up the tools for the finance agent.
     
     Args:
         rag_manager: The RAG manager for financial knowledge retrieval
         llm: The language model to use for SQL toolkit
         user_email: The email of the currently logged in user
+        conversation_id: The current conversation, used to keep knowledge base
+                         follow-up questions in context
     """
+    session_id = user_email if user_email else "anonymous"
+    if conversation_id:
+        session_id = f"{session_id}:{conversation_id}"
+
     def get_stock_price(ticker):
         """Get the latest price for a stock ticker."""
         try:
@@ -23,23 +30,49 @@ def setup_tools(rag_manager: RAGManager, llm, user_email: Optional[str] = None):
         except Exception as e:
             return f"Error fetching stock price: {str(e)}"
         
-    def retrieve_financial_knowledge(query):
+    def retrieve_financial_knowledge(query: str, namespace: Optional[str] = None, topic: Optional[str] = None):
         """Retrieve financial knowledge from the vector store."""
         try:
             print(f"Retrieving financial knowledge for user: {user_email}")
-            print(f"Query: {query}")
+            print(f"Query: {query} (namespace: {namespace or 'all'}, topic: {topic or 'any'})")
             print("="*100)
-            rag_chain = rag_manager.get_conversational_rag_chain()
+            rag_chain = rag_manager.get_conversational_rag_chain(
+                namespace=namespace,
+                metadata_filter={"topic": topic} if topic else None
+            )
         
             response = rag_chain.invoke(
                 {"input": query},
-                config={"configurable": {"session_id": user_email if user_email else "anonymous"}}
+                config={"configurable": {"session_id": session_id}}
             )
             
             return response["answer"]
         
         except Exception as e:
             return f"Error retrieving financial knowledge: {str(e)}"
+
+    def run_analytics(report, *args):
+        """Run a precompiled aggregate on the user's cached snapshot."""
+        if not user_email:
+            return "No user is logged in."
+        try:
+            return report(analytics.snapshot_cache.get(user_email), *args)
+        except Exception as e:
+            return f"Error computing analytics: {str(e)}"
+
+    def run_python(code):
+        # Code that touches the finance database may have modified it, so the
+        # analytics snapshots are dropped rather than risk serving stale data.
+        result = python_repl.run(code)
+        if "sqlite" in code.lower() or ".db" in code.lower():
+            analytics.snapshot_cache.invalidate()
+        return result
+
+    def parse_int(value, default):
+        try:
+            return max(1, int(str(value).strip()))
+        except (TypeError, ValueError):
+            return default
         
     python_repl = PythonREPLTool()
 
@@ -53,23 +86,51 @@ def setup_tools(rag_manager: RAGManager, llm, user_email: Optional[str] = None):
         ),
         Tool(
             name="python_calculator",
-            func=python_repl.run,
-            description="Useful for performing calculations, data analysis, or generating visualizations. Input should be Python code."
+            func=run_python,
+            description="Useful for performing calculations, data analysis, or generating visualizations. Input should be Python code. Do not use this to modify the finance database; use sql_db_query for any database changes."
         ),
         Tool(
             name="market_research",
             func=tavily_search.invoke,
             description="Search the web for financial news, market analysis, or investment advice. Input should be a search query."
         ),
-        Tool.from_function(
+        StructuredTool.from_function(
             func=retrieve_financial_knowledge,
             name="retrieve_financial_knowledge",
-            description="""Retrieve financial knowledge, investment fundamentals 
+            description=f"""Retrieve financial knowledge, investment fundamentals 
             and advice from our knowledge base with conversation memory. 
             This tool maintains conversation history for contextual follow-up questions. 
             Use this for questions about financial advice, investment strategies, best practices, 
-            recommendations, or when you need expert financial guidance.""",
+            recommendations, or when you need expert financial guidance.
+            All knowledge base namespaces are searched unless `namespace` is given.
+            Available namespaces: {", ".join(rag_manager.list_namespaces())}.
+            Optionally pass `topic` to only use knowledge tagged with that topic.""",
             return_direct=True
+        ),
+        Tool(
+            name="spending_by_category",
+            func=lambda _: run_analytics(analytics.format_totals_by_category),
+            description="Get the logged in user's total income and spending per transaction category. Input is ignored."
+        ),
+        Tool(
+            name="spending_by_month",
+            func=lambda _: run_analytics(analytics.format_totals_by_month),
+            description="Get the logged in user's income, spending and net amount for each month. Use this for month-over-month comparisons. Input is ignored."
+        ),
+        Tool(
+            name="top_merchants",
+            func=lambda n: run_analytics(analytics.format_top_merchants, parse_int(n, 5)),
+            description="Get the transaction descriptions where the logged in user spent the most. Input should be the number of results to return (e.g., 5)."
+        ),
+        Tool(
+            name="rolling_monthly_spending",
+            func=lambda window: run_analytics(analytics.format_rolling_monthly_spending, parse_int(window, 3)),
+            description="Get the logged in user's spending for each calendar month with a trailing average for spotting spending trends. Months without expenses count as zero. Input should be the averaging window in months (e.g., 3)."
+        ),
+        Tool(
+            name="portfolio_summary",
+            func=lambda _: run_analytics(analytics.format_portfolio_summary),
+            description="Get the logged in user's shares held and cost basis per stock symbol. Input is ignored."
         )
     ]
     
@@ -104,6 +165,24 @@ List all tables in the finance database
 Use this when you need to check what tables are available for querying.
 """
     
+    # Analytics snapshots are cached in memory, so any statement that may
+    # modify the database has to drop them before the next aggregate runs.
+    for i, tool in enumerate(sql_tools):
+        if tool.name == "sql_db_query":
+            sql_query_tool = tool
+
+            def run_query(query):
+                result = sql_query_tool.run(query)
+                if not query.lstrip().upper().startswith(("SELECT", "PRAGMA", "EXPLAIN")):
+                    analytics.snapshot_cache.invalidate()
+                return result
+
+            sql_tools[i] = Tool(
+                name=tool.name,
+                func=run_query,
+                description=tool.description
+            )
+    
     tools.extend(cast(List[Tool], sql_tools))
     
     return tools 
\ No newline at end of file